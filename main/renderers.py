@@ -0,0 +1,41 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer that serializes responses with orjson.
+
+    Datetimes and any types orjson does not know (Decimal, lazy strings,
+    querysets, ...) are handed to DRF's encoder, and U+2028/U+2029 are
+    escaped as DRF does. Known differences from JSONRenderer:
+
+    * any requested indent is rendered with two spaces (the only width
+      orjson supports);
+    * NaN and +/-Infinity are emitted as ``null`` instead of raising
+      under ``STRICT_JSON``.
+
+    Data orjson cannot serialize at all, such as integers wider than
+    64 bits, is rendered by JSONRenderer instead.
+    """
+
+    _default = JSONEncoder().default
+    _options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        options = self._options
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+
+        try:
+            ret = orjson.dumps(data, default=self._default, option=options)
+        except TypeError:
+            # orjson.JSONEncodeError subclasses TypeError
+            return super().render(data, accepted_media_type, renderer_context)
+        # Unescaped line/paragraph separators break JSON embedded in JS
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
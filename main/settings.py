@@ -107,6 +107,10 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    "DEFAULT_RENDERER_CLASSES": (
+        "main.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 
 ROOT_URLCONF = "main.urls"
@@ -210,8 +214,12 @@ CELERY_CHORD_PROPAGATES = True
 CELERY_TASK_IGNORE_RESULT = False
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://:redis123@redis:6379/1")
+# Redis Stack instance holding the LLM message history and response caches
+LLM_REDIS_URL = os.getenv("LLM_REDIS_URL", "redis://:redis123@localhost:6379/0")
 
 CELERY_BROKER_URL = os.getenv("CELERY_URL", "redis://:redis123@redis:6379/0")
+CELERY_BROKER_POOL_LIMIT = 64
+CELERY_BROKER_TRANSPORT_OPTIONS = {"max_connections": 64}
 
 CELERY_RESULT_BACKEND = os.getenv(
     "CELERY_RESULT_BACKEND", "redis://:redis123@redis:6379/0"
@@ -0,0 +1,44 @@
+import json
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from main.renderers import ORJSONRenderer
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    def setUp(self):
+        self.renderer = ORJSONRenderer()
+
+    def test_utc_datetime_matches_drf_format(self):
+        data = {"at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)}
+        self.assertEqual(self.renderer.render(data), b'{"at":"2024-01-02T03:04:05Z"}')
+        self.assertEqual(
+            json.loads(self.renderer.render(data)),
+            json.loads(JSONRenderer().render(data)),
+        )
+
+    def test_line_and_paragraph_separators_are_escaped(self):
+        ret = self.renderer.render({"text": "a\u2028b\u2029c"})
+        self.assertEqual(ret, b'{"text":"a\\u2028b\\u2029c"}')
+        self.assertEqual(json.loads(ret)["text"], "a\u2028b\u2029c")
+
+    def test_indent_from_renderer_context(self):
+        ret = self.renderer.render({"a": 1}, renderer_context={"indent": 4})
+        self.assertEqual(ret, b'{\n  "a": 1\n}')
+
+    def test_indent_from_accepted_media_type(self):
+        ret = self.renderer.render({"a": 1}, "application/json; indent=4")
+        self.assertEqual(ret, b'{\n  "a": 1\n}')
+
+    def test_no_indent_by_default(self):
+        self.assertEqual(self.renderer.render({"a": 1}), b'{"a":1}')
+
+    def test_falls_back_to_json_renderer_for_big_integers(self):
+        data = {"big": 2**70}
+        self.assertEqual(self.renderer.render(data), JSONRenderer().render(data))
+        self.assertEqual(json.loads(self.renderer.render(data))["big"], 2**70)
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(self.renderer.render(None), b"")
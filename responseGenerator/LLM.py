@@ -1,74 +1,252 @@
+import asyncio
+import functools
+import hashlib
+import logging
+import threading
+import uuid
+
+from django.conf import settings
 from llama_index.llms.openai import OpenAI
 from llama_index.llms.gemini import Gemini
 from llama_index.core.llms import ChatMessage
+from redisvl.extensions.cache.llm import SemanticCache
 from redisvl.extensions.message_history import MessageHistory
 from redisvl.extensions.message_history import SemanticMessageHistory
+from redisvl.query.filter import Tag
+from redisvl.utils.vectorize import CustomTextVectorizer, HFTextVectorizer
+from responseGenerator.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=512)
+def _get_provider_model(api_key: str, selected_model: str):
+    """Build the provider client for a model, reused across LLM instances.
+
+    Sharing the client keeps its HTTP connection pool warm, so repeat
+    prompts skip the TCP and TLS handshake with the provider.
+    """
+    if selected_model.lower().startswith("gpt"):
+        return OpenAI(
+            api_key=api_key,
+            model="o1-mini",
+            system_prompt="You are a helpful assistant. Reason step by step. read the past messages carefully for more personalized responses.",
+        )
+    if selected_model.lower().startswith("gemini"):
+        return Gemini(
+            api_key=api_key,
+            model="models/gemini-1.5-flash",
+            system_prompt="You are a helpful assistant. Reason step by step. read the past messages carefully for more personalized responses.",
+        )
+    raise ValueError(f"Unsupported model: {selected_model}")
 
 
 class LLM:
-    def __init__(self, api_key: str, selected_model: str):
+    # Bump whenever the vector schema changes; RedisVL refuses to attach to an
+    # existing index whose schema differs, so new names avoid startup failures.
+    # Index names double as key prefixes and RediSearch matches prefixes as
+    # plain strings, so no name may be a prefix of another (or of the legacy
+    # "tutor" index)
+    _INDEX_VERSION = "v2"
+    _vectorizer = None
+    _vectorizer_lock = threading.Lock()
+    _ROLE_MAP = {"llm": "assistant"}
+
+    def __init__(
+        self,
+        api_key: str,
+        selected_model: str,
+        user_id: str | None = None,
+        session_tag: str | None = None,
+        cache_distance_threshold: float = 0.15,
+        cache_ttl: int | None = 60 * 60 * 24,
+        context_top_k: int = 4,
+    ):
         self.api_key = api_key
         self.selected_model = selected_model
+        self.user_id = user_id
+        # A user's history is tagged with their id so every instance, worker
+        # and model for that user reads the same conversation
+        self.session_tag = user_id or session_tag or uuid.uuid4().hex
+        self.context_top_k = context_top_k
+        self.cache_ttl = cache_ttl
         self.model = None
+        # Event loop the semantic cache's async client was created on
+        self._async_loop = None
+        # History, caches and exact-match lookups share one connection pool
+        self.redis = get_redis(settings.LLM_REDIS_URL)
+        self.vectorizer = self._get_vectorizer()
+        # Cached replies are only ever served back to the user they were
+        # generated for
         self.semantic_history = SemanticMessageHistory(
-            name="tutor",
-            redis_url="redis://:redis123@localhost:6379/0",
+            name=f"chat_history_{self._INDEX_VERSION}",
+            session_tag=self.session_tag,
+            redis_client=self.redis,
             distance_threshold=0.8,
-            device="cuda:0",
+            vectorizer=self.vectorizer,
+        )
+        self.llmcache = SemanticCache(
+            name=f"llm_response_cache_{self._INDEX_VERSION}",
+            redis_client=self.redis,
+            distance_threshold=cache_distance_threshold,
+            ttl=cache_ttl,
+            vectorizer=self.vectorizer,
+            filterable_fields=[
+                {"name": "user", "type": "tag"},
+                {"name": "model", "type": "tag"},
+                {"name": "context", "type": "tag"},
+            ],
         )
         self.__initialize_llm__()
 
+    @classmethod
+    def _get_vectorizer(cls):
+        """Load the embedding model once and share it across all instances.
+
+        Embeddings are memoized so a prompt is only encoded once per chat,
+        and stored as FLOAT16 to halve the size of the Redis vector indexes.
+        """
+        if cls._vectorizer is None:
+            # Guard the load so concurrent first calls share one GPU copy
+            with cls._vectorizer_lock:
+                if cls._vectorizer is None:
+                    hf_vectorizer = HFTextVectorizer(
+                        model="sentence-transformers/msmarco-distilbert-cos-v5",
+                        device="cuda:0",
+                    )
+                    embed = functools.lru_cache(maxsize=256)(hf_vectorizer.embed)
+                    cls._vectorizer = CustomTextVectorizer(
+                        embed=embed,
+                        embed_many=hf_vectorizer.embed_many,
+                        dtype="float16",
+                    )
+        return cls._vectorizer
+
     def __initialize_llm__(self):
         """Initialize the appropriate LLM based on the selected model name."""
-        if self.selected_model.lower().startswith("gpt"):
-            self.model = OpenAI(
-                api_key=self.api_key,
-                model="o1-mini",
-                system_prompt="You are a helpful assistant. Reason step by step. read the past messages carefully for more personalized responses.",
-            )
-        elif self.selected_model.lower().startswith("gemini"):
-            self.model = Gemini(
-                api_key=self.api_key,
-                model="models/gemini-1.5-flash",
-                system_prompt="You are a helpful assistant. Reason step by step. read the past messages carefully for more personalized responses.",
-            )
-        else:
-            raise ValueError(f"Unsupported model: {self.selected_model}")
+        self.model = _get_provider_model(self.api_key, self.selected_model)
         return self.model
 
     def change_model(self, new_model: str):
-        """Change the LLM model dynamically."""
-        self.selected_model = new_model
-        self.model = self.__initialize_llm__()
-        return self.model
+        """Return an LLM for new_model that continues this conversation.
+
+        Instances are cached by get_llm(), so this one is left unchanged.
+        """
+        if self.user_id is None:
+            # Anonymous sessions are not cached by user, so carry the tag over
+            return LLM(self.api_key, new_model, session_tag=self.session_tag)
+        return get_llm(self.api_key, new_model, self.user_id)
 
-    def _get_chat_messages(self, prompt: str):
-        """Convert Redis message history into ChatMessage objects."""
-        messages = []
-        context = self.semantic_history.get_relevant(
-            prompt, top_k=10, role=["system", "llm", "tool", "user"]
+    def _get_context(self, prompt: str) -> list:
+        """Return the stored messages relevant to prompt."""
+        # Only user and llm turns are ever written to history
+        return self.semantic_history.get_relevant(
+            prompt, top_k=self.context_top_k, role=["llm", "user"]
         )
 
+    def _get_chat_messages(self, context: list):
+        """Yield ChatMessage objects for the retrieved history messages."""
+        to_role = self._ROLE_MAP.get
         for msg in context:
-            role = msg["role"]
-            if role == "llm":
-                role = "assistant"
-            content = msg["content"]
+            role, content = msg["role"], msg["content"]
             if role and content:
-                messages.append(ChatMessage(role=role, content=content))
-        return messages
+                yield ChatMessage(role=to_role(role, role), content=content)
+
+    def _build_chat_messages(self, prompt: str, context: list) -> list:
+        """Return the relevant history followed by the new user prompt."""
+        return [
+            *self._get_chat_messages(context),
+            ChatMessage(role="user", content=prompt),
+        ]
+
+    @staticmethod
+    def _context_digest(context: list) -> str:
+        """Fingerprint the retrieved history that a reply was generated from."""
+        digest = hashlib.sha256()
+        for msg in context:
+            digest.update(f"{msg['role']}\0{msg['content']}\0".encode())
+        return digest.hexdigest()
+
+    def _store_turn(self, prompt: str, reply: str):
+        """Write the user prompt and LLM reply to history in one pipelined call."""
+        self.semantic_history.add_messages(
+            [
+                {"role": "user", "content": prompt},
+                {"role": "llm", "content": reply},
+            ]
+        )
+
+    def _exact_cache_key(self, prompt: str, context_digest: str) -> str:
+        key = f"{self.user_id}\0{self.selected_model}\0{context_digest}\0{prompt}"
+        return f"llmcache:{hashlib.sha256(key.encode()).hexdigest()}"
+
+    def _cache_filter(self, context_digest: str):
+        return (
+            (Tag("user") == self.user_id)
+            & (Tag("model") == self.selected_model)
+            & (Tag("context") == context_digest)
+        )
+
+    def _get_cached_reply(self, prompt: str, context_digest: str):
+        """Look up a cached reply, trying an exact match before a semantic one.
+
+        Replies depend on the user's history, so entries only match the same
+        user and the same retrieved context, and caching is skipped for
+        instances without a user_id. Returns the reply (or None on a miss)
+        and the prompt embedding.
+        """
+        if self.user_id is None:
+            return None, None
+
+        cached = self.redis.get(self._exact_cache_key(prompt, context_digest))
+        if cached is not None:
+            return cached.decode(), None
+
+        prompt_vector = self.vectorizer.embed(prompt)
+        hit = self.llmcache.check(
+            vector=prompt_vector,
+            num_results=1,
+            filter_expression=self._cache_filter(context_digest),
+        )
+        return (hit[0]["response"] if hit else None), prompt_vector
+
+    def _cache_reply(self, prompt: str, reply: str, prompt_vector, context_digest: str):
+        """Store a fresh reply in both the exact-match and semantic caches."""
+        if self.user_id is None:
+            return
+        self.redis.set(
+            self._exact_cache_key(prompt, context_digest), reply, ex=self.cache_ttl
+        )
+        self.llmcache.store(
+            prompt=prompt,
+            response=reply,
+            vector=prompt_vector,
+            metadata={"model": self.selected_model},
+            filters={
+                "user": self.user_id,
+                "model": self.selected_model,
+                "context": context_digest,
+            },
+        )
 
     def chat(self, prompt: str) -> str:
         """Generate a response from the LLM and maintain conversation context."""
         if not self.model:
             raise ValueError("LLM model is not initialized.")
 
+        context = self._get_context(prompt)
+        context_digest = self._context_digest(context)
+        reply, prompt_vector = self._get_cached_reply(prompt, context_digest)
+        if reply is not None:
+            self._store_turn(prompt, reply)
+            return reply
+
         # Convert stored messages to LlamaIndex chat format
-        chat_messages = self._get_chat_messages(prompt)
-        chat_messages.append(ChatMessage(role="user", content=prompt))
-        print("======================================>", chat_messages)
+        chat_messages = self._build_chat_messages(prompt, context)
+        logger.debug("chat_messages=%d", len(chat_messages))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("chat_messages content: %s", chat_messages)
 
-        self.semantic_history.add_message({"role": "user", "content": prompt})
         # Get model response
         response = self.model.chat(chat_messages)
         reply = (
@@ -77,10 +255,168 @@ class LLM:
             else ""
         )
 
-        # Store assistant response back into Redis history
-        self.semantic_history.add_message({"role": "llm", "content": reply})
+        # Store the exchange back into Redis history
+        self._store_turn(prompt, reply)
+        if reply:
+            self._cache_reply(prompt, reply, prompt_vector, context_digest)
+        return reply
+
+    def stream(self, prompt: str, on_delta) -> str:
+        """Stream the LLM response, calling on_delta with each chunk of text."""
+        if not self.model:
+            raise ValueError("LLM model is not initialized.")
+
+        context = self._get_context(prompt)
+        context_digest = self._context_digest(context)
+        reply, prompt_vector = self._get_cached_reply(prompt, context_digest)
+        if reply is not None:
+            on_delta(reply)
+            self._store_turn(prompt, reply)
+            return reply
+
+        chat_messages = self._build_chat_messages(prompt, context)
+
+        chunks = []
+        for chunk in self.model.stream_chat(chat_messages):
+            if chunk.delta:
+                chunks.append(chunk.delta)
+                on_delta(chunk.delta)
+        reply = "".join(chunks).strip()
+
+        self._store_turn(prompt, reply)
+        if reply:
+            self._cache_reply(prompt, reply, prompt_vector, context_digest)
+        return reply
+
+    def _bind_async_loop(self):
+        """Drop the semantic cache's async client if the event loop changed.
+
+        RedisVL creates that client on first use and its connections belong
+        to the loop running at the time, so a later asyncio.run() would
+        otherwise reuse connections from a closed loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_loop is not loop:
+            self.llmcache._aindex = None
+            self.llmcache._async_redis_client = None
+            self._async_loop = loop
+
+    async def _aget_cached_reply(self, prompt: str, context_digest: str):
+        """Async variant of _get_cached_reply()."""
+        if self.user_id is None:
+            return None, None
+        self._bind_async_loop()
+
+        cached = await asyncio.to_thread(
+            self.redis.get, self._exact_cache_key(prompt, context_digest)
+        )
+        if cached is not None:
+            return cached.decode(), None
+
+        prompt_vector = await asyncio.to_thread(self.vectorizer.embed, prompt)
+        hit = await self.llmcache.acheck(
+            vector=prompt_vector,
+            num_results=1,
+            filter_expression=self._cache_filter(context_digest),
+        )
+        return (hit[0]["response"] if hit else None), prompt_vector
+
+    async def _acache_reply(
+        self, prompt: str, reply: str, prompt_vector, context_digest: str
+    ):
+        """Async variant of _cache_reply()."""
+        if self.user_id is None:
+            return
+        self._bind_async_loop()
+        await asyncio.to_thread(
+            self.redis.set,
+            self._exact_cache_key(prompt, context_digest),
+            reply,
+            ex=self.cache_ttl,
+        )
+        await self.llmcache.astore(
+            prompt=prompt,
+            response=reply,
+            vector=prompt_vector,
+            metadata={"model": self.selected_model},
+            filters={
+                "user": self.user_id,
+                "model": self.selected_model,
+                "context": context_digest,
+            },
+        )
+
+    async def achat(self, prompt: str) -> str:
+        """Async variant of chat() that does not block the event loop on I/O.
+
+        Calls may come from successive event loops, but not from two loops
+        running at the same time.
+        """
+        if not self.model:
+            raise ValueError("LLM model is not initialized.")
+
+        # Message history has no async client, so run its lookups off-loop
+        context = await asyncio.to_thread(self._get_context, prompt)
+        context_digest = self._context_digest(context)
+        reply, prompt_vector = await self._aget_cached_reply(prompt, context_digest)
+        if reply is not None:
+            await asyncio.to_thread(self._store_turn, prompt, reply)
+            return reply
+
+        chat_messages = self._build_chat_messages(prompt, context)
+
+        response = await self.model.achat(chat_messages)
+        reply = (
+            response.message.content.strip()
+            if response.message and response.message.content
+            else ""
+        )
+
+        await asyncio.to_thread(self._store_turn, prompt, reply)
+        if reply:
+            await self._acache_reply(prompt, reply, prompt_vector, context_digest)
         return reply
 
+    async def astream(self, prompt: str):
+        """Async generator yielding chunks of the LLM response as they arrive."""
+        if not self.model:
+            raise ValueError("LLM model is not initialized.")
+
+        context = await asyncio.to_thread(self._get_context, prompt)
+        context_digest = self._context_digest(context)
+        reply, prompt_vector = await self._aget_cached_reply(prompt, context_digest)
+        if reply is not None:
+            yield reply
+            await asyncio.to_thread(self._store_turn, prompt, reply)
+            return
+
+        chat_messages = self._build_chat_messages(prompt, context)
+
+        chunks = []
+        async for chunk in await self.model.astream_chat(chat_messages):
+            if chunk.delta:
+                chunks.append(chunk.delta)
+                yield chunk.delta
+        reply = "".join(chunks).strip()
+
+        await asyncio.to_thread(self._store_turn, prompt, reply)
+        if reply:
+            await self._acache_reply(prompt, reply, prompt_vector, context_digest)
+
     def reset_chat(self):
 
         self.semantic_history.clear()
+
+
+@functools.lru_cache(maxsize=64)
+def _get_cached_llm(api_key: str, selected_model: str, user_id: str | None) -> LLM:
+    return LLM(api_key=api_key, selected_model=selected_model, user_id=user_id)
+
+
+def get_llm(api_key: str, selected_model: str, user_id: str | None = None) -> LLM:
+    """Return a shared LLM instance for the given key, model and user.
+
+    Instances are shared between callers and must not be mutated.
+    """
+    # Call positionally so keyword and positional callers hit the same entry
+    return _get_cached_llm(api_key, selected_model, user_id)
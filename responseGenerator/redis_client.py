@@ -0,0 +1,21 @@
+import functools
+
+import redis
+from django.conf import settings
+
+
+@functools.lru_cache(maxsize=None)
+def _get_pool(url: str) -> redis.BlockingConnectionPool:
+    """Create one connection pool per Redis URL for the life of the process.
+
+    The pool blocks (up to timeout seconds) when all connections are in
+    use instead of raising "Too many connections".
+    """
+    return redis.BlockingConnectionPool.from_url(
+        url, max_connections=64, timeout=10, socket_keepalive=True
+    )
+
+
+def get_redis(url: str | None = None) -> redis.Redis:
+    """Return a Redis client backed by the shared pool for url (or REDIS_URL)."""
+    return redis.Redis(connection_pool=_get_pool(url or settings.REDIS_URL))
@@ -1,6 +1,9 @@
-from LLM import LLM
 import os
 
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
+
+from responseGenerator.LLM import LLM
+
 
 def test_llm_initialization():
     llm = LLM(
@@ -12,4 +15,5 @@ def test_llm_initialization():
         print(llm.chat(user_input))
 
 
-test_llm_initialization()
+if __name__ == "__main__":
+    test_llm_initialization()
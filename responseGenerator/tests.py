@@ -0,0 +1,138 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from redisvl.query.filter import Tag
+
+from responseGenerator.LLM import LLM
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode()
+
+
+class FakeSemanticCache:
+    """Stores entries in memory and matches them on their filter tags."""
+
+    def __init__(self, *args, **kwargs):
+        self.entries = []
+
+    def store(self, prompt, response, vector=None, metadata=None, filters=None):
+        self.entries.append((prompt, response, filters))
+
+    def check(self, vector=None, num_results=1, filter_expression=None):
+        wanted = str(filter_expression)
+        return [
+            {"response": response}
+            for prompt, response, filters in self.entries
+            if all(str(Tag(k) == v) in wanted for k, v in filters.items())
+        ][:num_results]
+
+
+class LoopBoundSemanticCache(FakeSemanticCache):
+    """Mimics RedisVL binding its async client to the first loop that uses it."""
+
+    _aindex = None
+    _async_redis_client = None
+
+    def _get_async_index(self):
+        loop = asyncio.get_running_loop()
+        if self._aindex is None:
+            self._aindex = loop
+        elif self._aindex is not loop:
+            raise RuntimeError("async client is bound to a different event loop")
+
+    async def acheck(self, **kwargs):
+        self._get_async_index()
+        return self.check(**kwargs)
+
+    async def astore(self, **kwargs):
+        self._get_async_index()
+        self.store(**kwargs)
+
+
+def chat_response(content):
+    return SimpleNamespace(message=SimpleNamespace(content=content))
+
+
+class LLMTestCase(SimpleTestCase):
+    cache_class = FakeSemanticCache
+
+    def setUp(self):
+        self.model = mock.Mock()
+        self.model.chat.side_effect = [chat_response("first"), chat_response("second")]
+        self.model.achat = mock.AsyncMock(
+            side_effect=[chat_response("first"), chat_response("second")]
+        )
+        vectorizer = mock.Mock()
+        vectorizer.embed.return_value = [0.0]
+
+        patches = [
+            mock.patch("responseGenerator.LLM.get_redis", return_value=FakeRedis()),
+            mock.patch("responseGenerator.LLM.SemanticMessageHistory"),
+            mock.patch("responseGenerator.LLM.SemanticCache", self.cache_class),
+            mock.patch(
+                "responseGenerator.LLM._get_provider_model", return_value=self.model
+            ),
+            mock.patch.object(LLM, "_get_vectorizer", return_value=vectorizer),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.llm = LLM("key", "gpt-4", user_id="user_a")
+        self.history = self.llm.semantic_history
+
+
+class LLMCacheContextTests(LLMTestCase):
+    def test_same_prompt_with_different_context_misses_cache(self):
+        self.history.get_relevant.return_value = [
+            {"role": "user", "content": "Tell me about Python generators"}
+        ]
+        self.assertEqual(self.llm.chat("explain more"), "first")
+
+        self.history.get_relevant.return_value = [
+            {"role": "user", "content": "Tell me about the French revolution"}
+        ]
+        self.assertEqual(self.llm.chat("explain more"), "second")
+        self.assertEqual(self.model.chat.call_count, 2)
+
+    def test_same_prompt_with_same_context_hits_cache(self):
+        self.history.get_relevant.return_value = [
+            {"role": "user", "content": "Tell me about Python generators"}
+        ]
+        self.assertEqual(self.llm.chat("explain more"), "first")
+        self.assertEqual(self.llm.chat("explain more"), "first")
+        self.assertEqual(self.model.chat.call_count, 1)
+
+    def test_semantic_cache_respects_context(self):
+        self.history.get_relevant.return_value = []
+        self.llm.chat("explain more")
+        # Drop the exact-match entry so the lookup reaches the semantic tier
+        self.llm.redis.data.clear()
+
+        self.history.get_relevant.return_value = [
+            {"role": "llm", "content": "Generators yield values lazily."}
+        ]
+        self.assertEqual(self.llm.chat("explain more"), "second")
+        self.assertEqual(self.model.chat.call_count, 2)
+
+
+class LLMAsyncLoopTests(LLMTestCase):
+    cache_class = LoopBoundSemanticCache
+
+    def test_achat_from_successive_event_loops(self):
+        self.history.get_relevant.return_value = []
+        self.assertEqual(asyncio.run(self.llm.achat("hello")), "first")
+        self.llm.redis.data.clear()
+        self.assertEqual(asyncio.run(self.llm.achat("hello")), "first")
+        self.assertEqual(self.model.achat.call_count, 1)
@@ -2,17 +2,18 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from responseGenerator.LLM import LLM
+from responseGenerator.LLM import get_llm
 
 
 class llmInitializer:
-    def __init__(self, api_key: str, selected_model: str):
+    def __init__(self, api_key: str, selected_model: str, user_id: str | None = None):
         self.api_key = api_key
         self.selected_model = selected_model
+        self.user_id = user_id
 
     def initialize(self):
         # Initialize the LLM with the provided API key and model
-        llm = LLM(api_key=self.api_key, selected_model=self.selected_model)
+        llm = get_llm(self.api_key, self.selected_model, self.user_id)
         return llm
 
 
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.7 on 2026-10-15 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='refreshtokenstore',
+            name='token',
+            field=models.CharField(max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='refreshtokenstore',
+            index=models.Index(condition=models.Q(('revoked', False)), fields=['token', 'revoked'], name='rts_tok_rev_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
 import uuid
 from django.utils import timezone
 
@@ -40,10 +41,19 @@ class UserProfile(AbstractUser):
 class RefreshTokenStore(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(UserProfile, on_delete=models.CASCADE)
-    token = models.CharField(max_length=512)  # ⚠️ Prefer storing a SHA256 hash here
+    token = models.CharField(max_length=64)  # SHA256 hex digest
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     revoked = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["token", "revoked"],
+                name="rts_tok_rev_idx",
+                condition=Q(revoked=False),
+            ),
+        ]
+
     def __str__(self):
         return f"RefreshToken for {self.user.username} (revoked={self.revoked})"
@@ -1,3 +1,133 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import RefreshTokenStore, UserProfile
+from users.views import _hash_refresh_token
+
+
+class SignUpConflictTests(APITestCase):
+    def setUp(self):
+        UserProfile.objects.create_user(
+            user_id="user_a", username="alice", email="alice@example.com", password="pw"
+        )
+        UserProfile.objects.create_user(
+            user_id="user_b", username="bob", email="bob@example.com", password="pw"
+        )
+
+    def signup(self, email, username):
+        return self.client.post(
+            reverse("signup"),
+            {"email": email, "password": "secret123", "username": username},
+            format="json",
+        )
+
+    def test_email_conflict_wins_over_username_conflict(self):
+        # The email belongs to alice and the username to bob
+        response = self.signup("alice@example.com", "bob")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Email already exists.")
+
+    def test_username_conflict(self):
+        response = self.signup("new@example.com", "bob")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["error"], "Username already exists.")
+
+    def test_signup_without_conflict(self):
+        response = self.signup("new@example.com", "carol")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(UserProfile.objects.filter(username="carol").exists())
+
+
+class RefreshTokenTests(APITestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(
+            user_id="user_a", username="alice", email="alice@example.com", password="pw"
+        )
+
+    def store_token(self, token_str):
+        return RefreshTokenStore.objects.create(
+            user=self.user,
+            token=_hash_refresh_token(token_str),
+            expires_at=timezone.now() + timedelta(days=7),
+        )
+
+    def test_forged_token_is_rejected_without_db_access(self):
+        self.client.cookies["refresh_token"] = "forged.jwt.token"
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse("refresh"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_invalid_jwt_does_not_revoke_stored_token(self):
+        entry = self.store_token("forged.jwt.token")
+        self.client.cookies["refresh_token"] = "forged.jwt.token"
+        response = self.client.post(reverse("refresh"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        entry.refresh_from_db()
+        self.assertFalse(entry.revoked)
+
+    def test_valid_token_returns_access_token(self):
+        token_str = str(RefreshToken.for_user(self.user))
+        self.store_token(token_str)
+        self.client.cookies["refresh_token"] = token_str
+        response = self.client.post(reverse("refresh"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+
+    def test_revoked_token_is_rejected(self):
+        token_str = str(RefreshToken.for_user(self.user))
+        entry = self.store_token(token_str)
+        entry.revoked = True
+        entry.save(update_fields=["revoked"])
+        self.client.cookies["refresh_token"] = token_str
+        response = self.client.post(reverse("refresh"))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class UserProfileTests(APITestCase):
+    def setUp(self):
+        self.user = UserProfile.objects.create_user(
+            user_id="user_a",
+            username="alice",
+            email="alice@example.com",
+            password="pw",
+            first_name="Alice",
+        )
+        access = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_put_updates_only_sent_fields_and_bumps_updated_at(self):
+        before = UserProfile.objects.get(pk=self.user.pk)
+        response = self.client.put(
+            reverse("user-info"), {"first_name": "Alicia"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["user"]["first_name"], "Alicia")
+
+        after = UserProfile.objects.get(pk=self.user.pk)
+        self.assertEqual(after.first_name, "Alicia")
+        self.assertEqual(after.last_name, before.last_name)
+        self.assertGreater(after.updated_at, before.updated_at)
+
+    def test_get_is_not_served_stale_after_put(self):
+        url = reverse("user-info")
+        self.assertEqual(self.client.get(url).data["first_name"], "Alice")
+
+        self.client.put(url, {"first_name": "Alicia"}, format="json")
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["first_name"], "Alicia")
+
+    def test_get_sets_private_cache_control(self):
+        response = self.client.get(reverse("user-info"))
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("max-age=30", response["Cache-Control"])
@@ -2,21 +2,29 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 from users.models import UserProfile, RefreshTokenStore
 from users.serializers import UserSerializer
 from rest_framework.permissions import IsAuthenticated
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.core.cache import cache
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import uuid
-import hashlib
+from hashlib import sha256 as _sha256
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def _hash_refresh_token(refresh_token_str):
+    """Return the SHA256 hex digest stored for a refresh token."""
+    return _sha256(refresh_token_str.encode()).hexdigest()
+
+
 @method_decorator(csrf_exempt, name="dispatch")
 class SignUPUserView(APIView):
     authentication_classes = []
@@ -36,13 +44,18 @@ class SignUPUserView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # ✅ Check if user already exists
-        if UserProfile.objects.filter(email=user_email).exists():
+        # ✅ Check if user already exists (email or username) in one query
+        conflicting_emails = list(
+            UserProfile.objects.filter(
+                Q(email=user_email) | Q(username=user_name)
+            ).values_list("email", flat=True)
+        )
+        if user_email in conflicting_emails:
             return Response(
                 {"error": "Email already exists."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        if UserProfile.objects.filter(username=user_name).exists():
+        if conflicting_emails:
             return Response(
                 {"error": "Username already exists."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -65,7 +78,7 @@ class SignUPUserView(APIView):
         refresh_token_str = str(refresh)
 
         # ✅ Store refresh token securely (store a SHA256 hash)
-        hashed_refresh = hashlib.sha256(refresh_token_str.encode()).hexdigest()
+        hashed_refresh = _hash_refresh_token(refresh_token_str)
 
         RefreshTokenStore.objects.create(
             user=user,
@@ -129,7 +142,7 @@ class LoginUserView(APIView):
         refresh_token_str = str(refresh)
 
         # ✅ Store hashed refresh token
-        hashed_refresh = hashlib.sha256(refresh_token_str.encode()).hexdigest()
+        hashed_refresh = _hash_refresh_token(refresh_token_str)
         RefreshTokenStore.objects.update_or_create(
             user=user,
             defaults={
@@ -179,15 +192,15 @@ class LogoutUserView(APIView):
             response.delete_cookie("refresh_token")
             return response
 
-        hashed_refresh = hashlib.sha256(refresh_token_str.encode()).hexdigest()
+        hashed_refresh = _hash_refresh_token(refresh_token_str)
 
         try:
-            token_entry = RefreshTokenStore.objects.get(
-                token=hashed_refresh, revoked=False
-            )
+            token_entry = RefreshTokenStore.objects.only(
+                "id", "expires_at", "revoked"
+            ).get(token=hashed_refresh, revoked=False)
             # ⚡ Mark as revoked instead of deleting
             token_entry.revoked = True
-            token_entry.save()
+            token_entry.save(update_fields=["revoked"])
 
             # Create response and clear the refresh token cookie
             response = Response(
@@ -222,37 +235,33 @@ class RefreshTokenView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        hashed_refresh = hashlib.sha256(refresh_token_str.encode()).hexdigest()
-
+        # Validate the JWT signature and expiry before touching the database
         try:
-            token_entry = RefreshTokenStore.objects.get(
-                token=hashed_refresh, revoked=False
+            refresh = RefreshToken(refresh_token_str)
+        except Exception as jwt_error:
+            return Response(
+                {"error": f"Invalid JWT token: {str(jwt_error)}"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
 
+        hashed_refresh = _hash_refresh_token(refresh_token_str)
+
+        try:
+            token_entry = RefreshTokenStore.objects.only(
+                "id", "expires_at", "revoked"
+            ).get(token=hashed_refresh, revoked=False)
+
             if token_entry.expires_at < timezone.now():
                 # Mark expired token as revoked
                 token_entry.revoked = True
-                token_entry.save()
+                token_entry.save(update_fields=["revoked"])
                 return Response(
                     {"error": "Refresh token has expired."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            # Validate the actual JWT token
-            try:
-                refresh = RefreshToken(refresh_token_str)
-                access_token = str(refresh.access_token)
-
-                return Response({"access": access_token}, status=status.HTTP_200_OK)
-
-            except Exception as jwt_error:
-                # If JWT validation fails, mark token as revoked
-                token_entry.revoked = True
-                token_entry.save()
-                return Response(
-                    {"error": f"Invalid JWT token: {str(jwt_error)}"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            access_token = str(refresh.access_token)
+            return Response({"access": access_token}, status=status.HTTP_200_OK)
 
         except RefreshTokenStore.DoesNotExist:
             logger.warning(
@@ -275,10 +284,17 @@ class UserProfileView(APIView):
     authentication_classes = [JWTAuthentication]
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(cache_control(private=True, max_age=30))
     def get(self, request):
         # ✅ request.user is already the user from the token
-        serializer = UserSerializer(request.user)
-        return Response(serializer.data)
+        # updated_at changes on every profile write, so it invalidates the key
+        user = request.user
+        cache_key = f"uprofile:{user.user_id}:{user.updated_at.timestamp()}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = UserSerializer(user).data
+            cache.set(cache_key, data, 300)
+        return Response(data)
 
     def put(self, request):
         user = request.user
@@ -298,12 +314,15 @@ class UserProfileView(APIView):
             "description",
         ]
 
-        # Loop through fields and update if present in request
-        for field in updatable_fields:
-            if field in request.data:
-                setattr(user, field, request.data[field])
+        # Only write the fields present in the request
+        changed = {f: request.data[f] for f in updatable_fields if f in request.data}
+        if changed:
+            # QuerySet.update() skips auto_now, so bump updated_at explicitly
+            changed["updated_at"] = timezone.now()
+            UserProfile.objects.filter(pk=user.pk).update(**changed)
+            for field, value in changed.items():
+                setattr(user, field, value)
 
-        user.save()
         serializer = UserSerializer(user)
         return Response(
             {"message": "Profile updated successfully.", "user": serializer.data},